@@ -1,8 +1,69 @@
+import mmap
+import os
 import re
 import time
+from dataclasses import dataclass, fields
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from functools import cached_property, lru_cache
+from itertools import islice
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from xml.parsers import expat
+from lxml import html as lxml_html
+
+
+# BLAST text output is plain ASCII
+_RE_SCORE_EVALUE = re.compile(
+    r"Score\s=\s(?P<bits>[\d\.]+)\sbits\s\((?P<score>\d+)\)"
+    r".*?Expect(?:\(\d+\))? = (?P<eval>[\deE\.\-]+)",
+    re.ASCII,
+)
+_RE_SCORE = re.compile(r"Score\s=\s([\d\.]+)\sbits\s\((\d+)\)", re.ASCII)
+_RE_EVALUE = re.compile(r"Expect(?:\(\d+\))? = ([\deE\.\-]+)", re.ASCII)
+_RE_IDENTITIES = re.compile(
+    r"Identities\s=\s(\d+)\/(\d+)\s\((\d+)\%\)", re.ASCII
+)
+
+# shared session: keeps connections to NCBI alive between calls
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            # return the last 5xx reply so callers can handle it themselves
+            raise_on_status=False,
+        ),
+    ),
+)
+_SESSION.headers.update(
+    {
+        "User-Agent": (
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/134.0.0.0 Safari/537.36"),
+        "Referer": "https://blast.ncbi.nlm.nih.gov/Blast.cgi",
+    }
+)
+
+
+def get_session():
+    """
+    Returns the shared requests session used for all NCBI calls.
+
+    Returns
+    -------
+    requests.Session
+        Module-level session with connection pooling and retries.
+    """
+    return _SESSION
 
 
 class Alignment:
@@ -65,12 +126,17 @@ class Alignment:
         self.query_align_chunks = query_align_chunks
         self.sbjct_align_chunks = sbjct_align_chunks
 
-        # полные строки выравнивания:
-        self.query_align = "".join(seq for _, seq, _ in query_align_chunks)
-        self.sbjct_align = "".join(seq for _, seq, _ in sbjct_align_chunks)
-
         self.subj_range = (sbjct_align_chunks[0][0], sbjct_align_chunks[-1][2])
 
+    # полные строки выравнивания (собираются при первом обращении):
+    @cached_property
+    def query_align(self):
+        return "".join([chunk[1] for chunk in self.query_align_chunks])
+
+    @cached_property
+    def sbjct_align(self):
+        return "".join([chunk[1] for chunk in self.sbjct_align_chunks])
+
     def __repr__(self):
         return (
             f"{self.subj_id=}, {self.subj_name=}, {self.subj_len=}, {self.subj_range=}, "
@@ -79,8 +145,160 @@ class Alignment:
         )
 
 
+@dataclass
+class AlignmentTable:
+    """
+    Column-wise storage of BLAST alignment results. Numeric fields are
+    NumPy arrays, so filters like `table[table.e_value < 1e-50]` are
+    vectorized. Missing integer values are stored as -1, missing float
+    values as NaN.
+
+    Parameters
+    ----------
+    subj_id : list of str
+        Subject IDs of the matched sequences.
+    subj_name : list of str
+        Subject sequence descriptions.
+    subj_len : numpy.ndarray of int64
+        Lengths of the subject sequences.
+    score_bits : numpy.ndarray of float64
+        Scores in bits.
+    score : numpy.ndarray of int32
+        Raw scores.
+    e_value : numpy.ndarray of float64
+        E-values.
+    identities : numpy.ndarray of int32
+        Identity percentages.
+    match_len : numpy.ndarray of int32
+        Numbers of identical positions.
+    align_len : numpy.ndarray of int32
+        Alignment lengths.
+    chunks : list of tuple
+        (query_align_chunks, sbjct_align_chunks) for each alignment.
+    raw_scores : list of tuple
+        (score_bits, score, e_value) as printed by BLAST, used to restore
+        Alignment objects exactly.
+    """
+
+    subj_id: list
+    subj_name: list
+    subj_len: np.ndarray
+    score_bits: np.ndarray
+    score: np.ndarray
+    e_value: np.ndarray
+    identities: np.ndarray
+    match_len: np.ndarray
+    align_len: np.ndarray
+    chunks: list
+    raw_scores: list
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a table from alignment records (Alignment keyword dicts).
+        """
+        def column(key, dtype, missing):
+            return np.array(
+                [missing if r[key] is None else r[key] for r in records],
+                dtype=dtype,
+            )
+
+        return cls(
+            subj_id=[r["subj_id"] for r in records],
+            subj_name=[r["subj_name"] for r in records],
+            subj_len=column("subj_len", np.int64, -1),
+            score_bits=column("score_bits", np.float64, np.nan),
+            score=column("score", np.int32, -1),
+            # old BLAST versions print e-values like 'e-120'
+            e_value=np.array(
+                [
+                    np.nan if r["e_value"] is None
+                    else float("1" + r["e_value"]) if r["e_value"].startswith("e")
+                    else float(r["e_value"])
+                    for r in records
+                ],
+                dtype=np.float64,
+            ),
+            identities=column("identities", np.int32, -1),
+            match_len=column("match_len", np.int32, -1),
+            align_len=column("align_len", np.int32, -1),
+            chunks=[
+                (r["query_align_chunks"], r["sbjct_align_chunks"]) for r in records
+            ],
+            raw_scores=[(r["score_bits"], r["score"], r["e_value"]) for r in records],
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, AlignmentTable):
+            return NotImplemented
+        for field in fields(self):
+            a, b = getattr(self, field.name), getattr(other, field.name)
+            if isinstance(a, np.ndarray):
+                if not np.array_equal(a, b, equal_nan=a.dtype.kind == "f"):
+                    return False
+            elif a != b:
+                return False
+        return True
+
+    def __len__(self):
+        return len(self.subj_id)
+
+    def __getitem__(self, index):
+        """
+        Selects rows by a boolean mask, an array of indices or a slice.
+        An integer index returns the row as an Alignment object.
+        """
+        if isinstance(index, (int, np.integer)):
+            return self._alignment(range(len(self))[index])
+
+        idx = np.arange(len(self))[index]
+        return AlignmentTable(
+            subj_id=[self.subj_id[i] for i in idx],
+            subj_name=[self.subj_name[i] for i in idx],
+            subj_len=self.subj_len[idx],
+            score_bits=self.score_bits[idx],
+            score=self.score[idx],
+            e_value=self.e_value[idx],
+            identities=self.identities[idx],
+            match_len=self.match_len[idx],
+            align_len=self.align_len[idx],
+            chunks=[self.chunks[i] for i in idx],
+            raw_scores=[self.raw_scores[i] for i in idx],
+        )
+
+    def to_alignments(self):
+        """
+        Yields the rows as Alignment objects, identical to the ones
+        returned by `parse_blast_text_output`.
+        """
+        for i in range(len(self)):
+            yield self._alignment(i)
+
+    def _alignment(self, i):
+        def value(column):
+            return None if column[i] == -1 else int(column[i])
+
+        query_chunks, sbjct_chunks = self.chunks[i]
+        score_bits, score, e_value = self.raw_scores[i]
+        return Alignment(
+            subj_id=self.subj_id[i],
+            subj_name=self.subj_name[i],
+            subj_len=value(self.subj_len),
+            score_bits=score_bits,
+            score=score,
+            e_value=e_value,
+            identities=value(self.identities),
+            match_len=value(self.match_len),
+            align_len=value(self.align_len),
+            query_align_chunks=query_chunks,
+            sbjct_align_chunks=sbjct_chunks,
+            subj_range=None,
+        )
+
+
 def run_blast(sequence, programm="tblastn", database="nt",
-              taxon=None, wait=True, **params):
+              taxon=None, wait=True, max_wait_s=None, wgs_prefixes=None,
+              validate=False, **params):
     """
     Submits a BLAST job to NCBI and retrieves parsed alignment results
     as Alignment objects.
@@ -97,6 +315,17 @@ def run_blast(sequence, programm="tblastn", database="nt",
     taxon : str, optional
         Taxonomic restriction query string (e.g., species name or
         NCBI taxonomy ID).
+    wait : bool, optional
+        Whether to wait for the results or return the RID right away.
+    max_wait_s : float, optional
+        Maximum time in seconds to wait for the results (see
+        `wait_for_blast_results`).
+    wgs_prefixes : list of str, optional
+        WGS prefixes to search against (e.g., ['ACOL01', 'AEYK01']).
+        Overrides `database` and `taxon`, and skips the WGS index search.
+    validate : bool, optional
+        Whether to check `wgs_prefixes` through getDBInfo.cgi before
+        submitting. Invalid prefixes are dropped.
     **params : dict
         Additional optional BLAST parameters.
 
@@ -104,12 +333,22 @@ def run_blast(sequence, programm="tblastn", database="nt",
     -------
     alignments : list of Alignment
         Parsed results containing sequence alignments.
+
+    Raises
+    ------
+    ValueError
+        If `wgs_prefixes` is empty, or no prefix passes validation.
     """
-    if database == "wgs" and taxon:
-        response = requests.post(
-            "https://www.ncbi.nlm.nih.gov/Traces/wgs/index.cgi?",
-            data={'q': f'&wt=xml&q=text%3A*{taxon}*%20AND%20project_s%3Awgs'})
-        prefixes = extract_prefix_organism_pairs(response.text)
+    if wgs_prefixes is not None:
+        if validate:
+            wgs_prefixes = filter_valid_wgs_ids(wgs_prefixes)
+        if not wgs_prefixes:
+            raise ValueError("No valid WGS prefixes to search against.")
+        database = " ".join([f"WGS_VDB://{p}" for p in wgs_prefixes])
+        print("database:", database)
+        taxon = None
+    elif database == "wgs" and taxon:
+        prefixes = fetch_wgs_prefixes(taxon)
         print("prefixes:", prefixes)
         prefix_list = [p for p, _ in prefixes]
         prefixes = filter_valid_wgs_ids(prefix_list)  # checks for database validity
@@ -133,7 +372,7 @@ def run_blast(sequence, programm="tblastn", database="nt",
         print(f"{key}: {str(value)}")
 
     # request
-    response = requests.post("https://blast.ncbi.nlm.nih.gov/Blast.cgi", data=data)
+    response = get_session().post("https://blast.ncbi.nlm.nih.gov/Blast.cgi", data=data)
     text = response.text
     print(f"NCBI initial response: {response.status_code}")
 
@@ -155,12 +394,103 @@ def run_blast(sequence, programm="tblastn", database="nt",
         raise Exception("RID not found in response. Full response:\n" + text)
 
     if wait:
-        return wait_for_blast_results(rid)
+        return wait_for_blast_results(rid, max_wait_s=max_wait_s)
     else:
         return rid
 
 
-def wait_for_blast_results(rid, rtoe=10, poll_interval=5, verbose=True):
+def run_blast_batch(records, max_workers=3, **kwargs):
+    """
+    Runs BLAST for several sequences concurrently and yields results
+    as soon as each job is finished.
+
+    Parameters
+    ----------
+    records : iterable of tuple
+        (header, sequence) pairs, e.g. from `parse_fasta`.
+    max_workers : int, optional
+        Maximum number of simultaneous BLAST jobs. NCBI asks not to
+        exceed a few concurrent requests.
+    **kwargs : dict
+        Arguments passed to `run_blast` for every sequence.
+
+    Yields
+    ------
+    header : str
+        Header of the finished sequence.
+    alignments : list of Alignment or Exception
+        Parsed results for that sequence, or the exception raised by
+        its job. A failed job does not stop the other ones.
+    """
+    kwargs["wait"] = True
+    records = iter(records)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+
+    def submit(n):
+        # read records lazily: at most max_workers jobs are in flight
+        for header, sequence in islice(records, n):
+            futures[executor.submit(run_blast, sequence=sequence, **kwargs)] = header
+
+    try:
+        submit(max_workers)
+        while futures:
+            done, _ = wait_futures(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                header = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                submit(1)
+                yield header, result
+    finally:
+        # on early exit drop the jobs that have not started yet
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_fasta(path):
+    """
+    Reads a FASTA file record by record. The file is memory-mapped, so
+    large files are paged in on demand instead of being read into memory.
+
+    Parameters
+    ----------
+    path : str
+        Path to the FASTA file.
+
+    Yields
+    ------
+    header : str
+        Record header without the leading '>'.
+    sequence : str
+        Record sequence with line breaks removed.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = 0 if mm[:1] == b">" else mm.find(b"\n>") + 1
+            if start == 0 and mm[:1] != b">":
+                return  # no records
+
+            while start < size:
+                end = mm.find(b"\n>", start)
+                end = size if end == -1 else end + 1
+                header_end = mm.find(b"\n", start, end)
+                if header_end == -1:
+                    header_end = end
+
+                header = mm[start + 1:header_end].decode().strip()
+                # drop line breaks at C speed
+                sequence = mm[header_end:end].translate(None, b" \t\r\n").decode()
+                yield header, sequence
+                start = end
+
+
+def wait_for_blast_results(rid, rtoe=10, poll_interval=5, verbose=True,
+                           max_poll_interval=60, max_wait_s=None):
     """
     Waits for a BLAST job to complete, fetches the result in text format,
     and parses the alignments.
@@ -172,9 +502,15 @@ def wait_for_blast_results(rid, rtoe=10, poll_interval=5, verbose=True):
     rtoe : int, optional
         Recommended time of execution (in seconds). Used as fallback sleep time.
     poll_interval : int, optional
-        Interval in seconds between status checks while waiting.
+        Initial interval in seconds between status checks while waiting.
+        Doubled after each check, up to `max_poll_interval`.
     verbose : bool, optional
         Whether to print status updates.
+    max_poll_interval : int, optional
+        Upper bound in seconds for the interval between status checks.
+    max_wait_s : float, optional
+        Maximum time in seconds to wait for the job. Waits indefinitely
+        if None.
 
     Returns
     -------
@@ -185,9 +521,30 @@ def wait_for_blast_results(rid, rtoe=10, poll_interval=5, verbose=True):
     ------
     Exception
         If the job fails, expires, or if result cannot be retrieved.
+    TimeoutError
+        If the job is not ready after `max_wait_s` seconds.
     """
+    deadline = None if max_wait_s is None else time.monotonic() + max_wait_s
+
+    def check_deadline():
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(
+                f"BLAST job not ready after {max_wait_s} sec. RID: {rid}"
+            )
+
+    def sleep(delay):
+        # never sleep past the deadline
+        check_deadline()
+        if deadline is not None:
+            delay = min(delay, deadline - time.monotonic())
+        time.sleep(max(delay, 0))
+        check_deadline()
+
+    i = 0
     while True:
-        response = requests.get(
+        check_deadline()
+
+        response = get_session().get(
             "https://blast.ncbi.nlm.nih.gov/Blast.cgi",
             params={"CMD": "Get", "RID": rid},
         )
@@ -199,7 +556,8 @@ def wait_for_blast_results(rid, rtoe=10, poll_interval=5, verbose=True):
         if "Status=WAITING" in html:
             if verbose:
                 print("Waiting for BLAST job to complete...")
-            time.sleep(poll_interval)
+            sleep(min(poll_interval * 2 ** i, max_poll_interval))
+            i += 1
         elif "Status=FAILED" in html:
             raise Exception(f"BLAST search failed. RID: {rid}")
         elif "Status=UNKNOWN" in html:
@@ -214,9 +572,9 @@ def wait_for_blast_results(rid, rtoe=10, poll_interval=5, verbose=True):
                     )
                 break
         else:
-            time.sleep(rtoe)
+            sleep(rtoe)
 
-    result = requests.get(
+    result = get_session().get(
         "https://blast.ncbi.nlm.nih.gov/Blast.cgi",
         params={
             "CMD": "Get",
@@ -246,162 +604,368 @@ def parse_blast_text_output(text):
     alignments : list of Alignment
         List of alignment records parsed from the output.
     """
-    alignments = []
+    lines, bounds = _split_blocks(text)
+    return [Alignment(**record) for record in _parse_blocks(lines, bounds)]
+
+
+def parse_blast_text_table(text):
+    """
+    Parses BLAST text output into a columnar AlignmentTable.
+
+    Parameters
+    ----------
+    text : str
+        Raw BLAST output in text format.
+
+    Returns
+    -------
+    table : AlignmentTable
+        Alignment records stored column-wise.
+    """
+    lines, bounds = _split_blocks(text)
+    return AlignmentTable.from_records(_parse_blocks(lines, bounds))
 
-    blocks = text.split("\n\n>")
-    first_block = blocks[0]
-    if first_block.startswith("<p>"):
-        blocks[0] = first_block.split("ALIGNMENTS")[1].strip()
-    else:
-        blocks[0] = blocks[0]
 
-    for block in blocks:
-        lines = block.strip().split("\n")
-        subj_line = lines[0]
-        subj_id = subj_line.split()[0].lstrip(">")  # remove '>'
-        subj_name = " ".join(subj_line.split()[1:])
+def _split_blocks(text):
+    """
+    Splits BLAST text output into lines and finds subject block boundaries.
+
+    Parameters
+    ----------
+    text : str
+        Raw BLAST output in text format.
+
+    Returns
+    -------
+    lines : list of str
+        Lines of BLAST output.
+    bounds : list of int
+        Line indices where subject blocks start, followed by the index
+        where the last block ends.
+    """
+    lines = text.splitlines()
+    start = 0
+    if text.startswith("<p>"):
+        # skip the HTML header up to the ALIGNMENTS section
+        for start, line in enumerate(lines):
+            if "ALIGNMENTS" in line:
+                break
+        else:
+            return lines, [len(lines)]
+        start += 1
+
+    # a new subject block starts with '>' right after an empty line
+    bounds = [start]
+    for j in range(start + 1, len(lines)):
+        if not lines[j - 1] and lines[j].startswith(">"):
+            bounds.append(j)
+    bounds.append(len(lines))
+    return lines, bounds
+
+
+def _parse_blocks(lines, bounds):
+    """
+    Parses subject blocks of BLAST text output into plain records.
+
+    Parameters
+    ----------
+    lines : list of str
+        Lines of BLAST output.
+    bounds : list of int
+        Line indices where subject blocks start, followed by the index
+        where the last block ends.
 
-        i = 1
-        while i < len(lines):
-            subj_len = score = e_value = identities = align_len = None
+    Returns
+    -------
+    records : list of dict
+        Keyword arguments for Alignment, one dict per alignment.
+    """
+    records = []
+    append = records.append
+    score_evalue_search = _RE_SCORE_EVALUE.search
+    score_search = _RE_SCORE.search
+    evalue_search = _RE_EVALUE.search
+    identities_search = _RE_IDENTITIES.search
+
+    for block_start, block_end in zip(bounds, bounds[1:]):
+        while block_start < block_end and not lines[block_start].strip():
+            block_start += 1
+        if block_start == block_end:
+            continue
+
+        subj_fields = lines[block_start].split()
+        subj_id = subj_fields[0].lstrip(">")  # remove '>'
+        subj_name = " ".join(subj_fields[1:])
+
+        i = block_start + 1
+        while i < block_end:
+            subj_len = score_bits = score = e_value = None
+            identities = match_len = align_len = subj_range = None
             query_chunks, sbjct_chunks = [], []
 
-            while i < len(lines):
+            while i < block_end:
                 line = lines[i]
-                if line.startswith("Length="):
-                    subj_len = int(line.split("=")[1])
-                elif line.startswith(" Score ="):
-                    score_match = re.search(
-                        r"Score\s=\s([\d\.]+)\sbits\s\((\d+)\)", line
-                    )
-                    evalue_match = re.search(
-                        r"Expect(?:\(\d+\))? = ([\deE\.\-]+)", line
-                    )
-                    score_bits = score_match.group(1) if score_match else None  # bits
-                    score = score_match.group(2) if score_match else None
-                    e_value = evalue_match.group(1) if evalue_match else None
-                elif "Identities" in line:
-                    ident_m = re.search(
-                        r"Identities\s=\s(\d+)\/(\d+)\s\((\d+)\%\)", line
-                    )
-                    match_len = int(ident_m.group(1))
-                    align_len = int(ident_m.group(2))
-                    identities = int(ident_m.group(3))
-                elif line.startswith("Query "):
-                    query_parts = line.split()
-                    q_start, q_seq, q_end = (
-                        int(query_parts[1]),
-                        query_parts[2],
-                        int(query_parts[3]),
-                    )
-                    query_chunks.append((q_start, q_seq, q_end))
-
-                    i += 2
-                    if i < len(lines):
-                        sbjct_parts = lines[i].split()
-                        s_start, s_seq, s_end = (
-                            int(sbjct_parts[1]),
-                            sbjct_parts[2],
-                            int(sbjct_parts[3]),
+                # dispatch on the first character, then check the prefix
+                first = line[:1]
+                if first == " ":
+                    if line.startswith(" Score ="):
+                        match = score_evalue_search(line)
+                        if match:
+                            score_bits, score, e_value = match.group(
+                                "bits", "score", "eval"
+                            )
+                        else:
+                            score_match = score_search(line)
+                            evalue_match = evalue_search(line)
+                            score_bits = score_match.group(1) if score_match else None  # bits
+                            score = score_match.group(2) if score_match else None
+                            e_value = evalue_match.group(1) if evalue_match else None
+                    elif "Identities" in line:
+                        ident_m = identities_search(line)
+                        match_len = int(ident_m.group(1))
+                        align_len = int(ident_m.group(2))
+                        identities = int(ident_m.group(3))
+                elif first == "Q":
+                    if line.startswith("Query "):
+                        query_parts = line.split()
+                        query_chunks.append(
+                            (int(query_parts[1]), query_parts[2], int(query_parts[3]))
                         )
-                        sbjct_chunks.append((s_start, s_seq, s_end))
-                        subj_range = (s_start, s_end)
-                elif line.startswith(">") or line.startswith("Sequence ID:"):
+
+                        i += 2
+                        if i < block_end:
+                            sbjct_parts = lines[i].split()
+                            s_start, s_end = int(sbjct_parts[1]), int(sbjct_parts[3])
+                            sbjct_chunks.append((s_start, sbjct_parts[2], s_end))
+                            subj_range = (s_start, s_end)
+                elif first == "L":
+                    if line.startswith("Length="):
+                        subj_len = int(line.split("=")[1])
+                elif first == ">" or (
+                    first == "S" and line.startswith("Sequence ID:")
+                ):
                     break  # start of a new subject
                 i += 1
 
-            alignments.append(
-                Alignment(
-                    subj_id=subj_id,
-                    subj_name=subj_name,
-                    subj_len=subj_len,
-                    subj_range=subj_range,
-                    score_bits=score_bits,
-                    score=score,
-                    e_value=e_value,
-                    identities=identities,
-                    align_len=align_len,
-                    match_len=match_len,
-                    query_align_chunks=query_chunks,
-                    sbjct_align_chunks=sbjct_chunks,
+            # skip sections without a score, identities or aligned sequences
+            if (
+                query_chunks
+                and sbjct_chunks
+                and score is not None
+                and identities is not None
+            ):
+                append(
+                    {
+                        "subj_id": subj_id,
+                        "subj_name": subj_name,
+                        "subj_len": subj_len,
+                        "subj_range": subj_range,
+                        "score_bits": score_bits,
+                        "score": score,
+                        "e_value": e_value,
+                        "identities": identities,
+                        "align_len": align_len,
+                        "match_len": match_len,
+                        "query_align_chunks": query_chunks,
+                        "sbjct_align_chunks": sbjct_chunks,
+                    }
                 )
-            )
 
-            while i < len(lines) and not lines[i].startswith(" Score ="):
+            while i < block_end and not lines[i].startswith(" Score ="):
                 i += 1
 
-    return alignments
+    return records
 
 
 def extract_prefix_organism_pairs(xml_text):
-    root = ET.fromstring(xml_text)
-    results = []
+    """
+    Extracts (prefix, organism) pairs from a WGS index XML response.
+
+    The response is parsed with expat callbacks, so no element objects
+    are created for the <doc> entries.
+
+    Parameters
+    ----------
+    xml_text : str or bytes
+        Raw XML returned by the WGS index (Traces/wgs/index.cgi).
 
-    # print numFound
-    result_element = root.find(".//result[@name='response']")
-    if result_element is not None:
-        num_found = result_element.attrib.get("numFound")
-        print(f"[WGS index] Found {num_found} matching entries.")
-
-    for doc in root.findall(".//doc"):
-        prefix = None
-        organism = None
-        for child in doc:
-            if child.tag == "str":
-                if child.attrib.get("name") == "prefix_s":
-                    prefix = child.text
-                elif child.attrib.get("name") == "organism_an":
-                    organism = child.text
-        if prefix and organism:
-            results.append((prefix, organism))
+    Returns
+    -------
+    results : list of tuple
+        List of (prefix, organism) pairs.
+    """
+    results = []
+    # field: 'prefix_s' or 'organism_an' while inside such a <str> of a <doc>
+    state = {"depth": 0, "doc_depth": None, "field": None, "text": [], "doc": {}}
+
+    def start_element(name, attrs):
+        state["depth"] += 1
+        if name == "result" and attrs.get("name") == "response":
+            # print numFound
+            num_found = attrs.get("numFound")
+            print(f"[WGS index] Found {num_found} matching entries.")
+        elif name == "doc":
+            state["doc_depth"] = state["depth"]
+            state["doc"] = {}
+        elif (
+            name == "str"
+            and state["doc_depth"] is not None
+            and state["depth"] == state["doc_depth"] + 1
+            and attrs.get("name") in ("prefix_s", "organism_an")
+        ):
+            state["field"] = attrs["name"]
+            state["text"] = []
+        elif state["field"] is not None:
+            # text after a nested element is not part of the value
+            state["doc"][state["field"]] = "".join(state["text"])
+            state["field"] = None
+
+    def char_data(data):
+        if state["field"] is not None:
+            state["text"].append(data)
+
+    def end_element(name):
+        if state["field"] is not None:
+            state["doc"][state["field"]] = "".join(state["text"])
+            state["field"] = None
+        elif name == "doc" and state["depth"] == state["doc_depth"]:
+            prefix = state["doc"].get("prefix_s")
+            organism = state["doc"].get("organism_an")
+            if prefix and organism:
+                results.append((prefix, organism))
+            state["doc_depth"] = None
+        state["depth"] -= 1
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.CharacterDataHandler = char_data
+    parser.EndElementHandler = end_element
+    parser.Parse(xml_text, True)
     return results
 
 
-def filter_valid_wgs_ids(prefixes):
+@lru_cache(maxsize=128)
+def _fetch_wgs_prefixes(taxon):
+    response = get_session().post(
+        "https://www.ncbi.nlm.nih.gov/Traces/wgs/index.cgi?",
+        data={'q': f'&wt=xml&q=text%3A*{taxon}*%20AND%20project_s%3Awgs'})
+    return tuple(extract_prefix_organism_pairs(response.text))
+
+
+def fetch_wgs_prefixes(taxon):
     """
-    Verifies WGS prefix validity through getDBInfo.cgi.
+    Searches the WGS index for projects matching a taxon. Results are
+    cached per taxon, see `clear_wgs_cache`.
+
+    Parameters
+    ----------
+    taxon : str
+        Taxonomic query string (e.g., species name).
+
+    Returns
+    -------
+    list of tuple
+        List of (prefix, organism) pairs.
+    """
+    return list(_fetch_wgs_prefixes(taxon))
+
+
+def filter_valid_wgs_ids(prefixes, chunk_size=200, max_workers=4):
+    """
+    Verifies WGS prefix validity through getDBInfo.cgi. Prefixes are
+    checked in chunks with concurrent requests, and results are cached
+    per chunk, see `clear_wgs_cache`.
 
     Parameters
     ----------
     prefixes : list of str
         Prefix list (e.g., ['ACOL01', 'AEYK01'])
+    chunk_size : int, optional
+        Maximum number of prefixes per request.
+    max_workers : int, optional
+        Maximum number of simultaneous requests.
 
     Returns
     -------
     dict
         Dict {prefix: organism}, only for valid prefixes.
+
+    Raises
+    ------
+    ValueError
+        If `chunk_size` is less than 1.
+    Exception
+        If the request for every chunk fails. Failed chunks are reported
+        and skipped as long as at least one chunk succeeds.
     """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+
+    prefixes = tuple(prefixes)
+    chunks = [
+        prefixes[i:i + chunk_size] for i in range(0, len(prefixes), chunk_size)
+    ]
+    if len(chunks) <= 1:
+        return dict(_filter_valid_wgs_ids(prefixes))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_filter_valid_wgs_ids, chunk) for chunk in chunks]
+
+    valid, errors = {}, []
+    for chunk, future in zip(chunks, futures):
+        try:
+            valid.update(future.result())
+        except Exception as e:
+            print(f"Prefix check failed for {chunk[0]}..{chunk[-1]}: {e}")
+            errors.append(e)
+
+    if len(errors) == len(chunks):
+        raise Exception(
+            f"Prefix check failed for all {len(chunks)} chunks."
+        ) from errors[0]
+    return valid
+
+
+def clear_wgs_cache():
+    """
+    Drops cached WGS index and prefix validation results.
+    """
+    _fetch_wgs_prefixes.cache_clear()
+    _filter_valid_wgs_ids.cache_clear()
+
+
+@lru_cache(maxsize=128)
+def _filter_valid_wgs_ids(prefixes):
     db_string = ",".join(f"WGS_VDB://{p}" for p in prefixes)
 
     headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/134.0.0.0 Safari/537.36"),
-        "Referer": "https://blast.ncbi.nlm.nih.gov/Blast.cgi",
         "Origin": "https://blast.ncbi.nlm.nih.gov",
         "Accept": "*/*",
     }
 
     params = {"DATABASE": db_string, "CMD": "getDBOrg"}
 
-    response = requests.get(
+    response = get_session().get(
         "https://blast.ncbi.nlm.nih.gov/getDBInfo.cgi", headers=headers, params=params
     )
     if response.status_code != 200:
         raise Exception(f"Request failed with status code {response.status_code}")
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    table = soup.find("table", {"id": "dbSpecies"})
-    if not table:
+    table = None
+    if response.text.strip():
+        tables = lxml_html.fromstring(response.text).xpath(
+            "//table[@id='dbSpecies']"
+        )
+        table = tables[0] if tables else None
+    if table is None:
         raise Exception("No species table found in response.")
 
     valid = {}
-    for row in table.find_all("tr")[1:]:
-        cols = row.find_all("td")
+    for row in list(table.iter("tr"))[1:]:
+        cols = list(row.iter("td"))
         if len(cols) >= 2:
-            db = cols[0].text.strip().replace("WGS_VDB://", "")
-            organism = cols[1].text.strip()
+            db = cols[0].text_content().strip().replace("WGS_VDB://", "")
+            organism = cols[1].text_content().strip()
             valid[db] = organism
 
-    return valid
+    return tuple(valid.items())